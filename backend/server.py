@@ -1,19 +1,39 @@
 from __future__ import annotations
 
 import os
+import logging
+import logging.handlers
 import re
 import json
 import asyncio
 import time
-from collections import deque
+import queue
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi.websockets import WebSocketState
 import azure.cognitiveservices.speech as speechsdk
 from openai import AzureOpenAI
 
 load_dotenv()
 
-app = FastAPI()
+# ----------------------------
+# Logging
+# 실제 출력(I/O)은 QueueListener 스레드가 처리하고, 이벤트 루프/SDK 콜백에서는 큐에 넣기만 한다
+# (리스너 시작/종료는 lifespan에서 관리, 시작 전 기록은 큐에 쌓였다가 시작 시 출력됨)
+# ----------------------------
+logger = logging.getLogger("voice_gate")
+logger.setLevel(os.getenv("LOG_LEVEL", "INFO").strip().upper() or "INFO")
+logger.propagate = False
+
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_handler)
 
 # ----------------------------
 # Single-session guard (optional)
@@ -41,6 +61,21 @@ SPEECH_VOICE = os.getenv("AZURE_SPEECH_VOICE", "ko-KR-SunHiNeural").strip()
 if not SPEECH_KEY or not SPEECH_REGION:
     raise RuntimeError("AZURE_SPEECH_KEY / AZURE_SPEECH_REGION env missing")
 
+# 유휴 세션 정리
+# - 연결 직후에는 프론트가 마이크 권한(getUserMedia)을 기다리는 중일 수 있으므로 첫 오디오 프레임까지는 넉넉히 대기
+# - 오디오가 한 번 들어온 뒤로는 마이크가 계속 프레임을 보내므로, 이 시간 동안 오디오가 없으면 끊긴 세션으로 보고 종료
+WS_FIRST_AUDIO_GRACE_SEC = float(os.getenv("WS_FIRST_AUDIO_GRACE_SEC", "60").strip() or 60)
+WS_IDLE_TIMEOUT_SEC = float(os.getenv("WS_IDLE_TIMEOUT_SEC", "15").strip() or 15)
+
+# ----------------------------
+# Blocking 호출 전용 스레드 풀
+# 기본 executor(asyncio.to_thread)를 공유하지 않고 용도별로 크기를 고정해 스레드 수/동시 호출 수를 제한
+# ----------------------------
+LLM_WORKERS = int(os.getenv("LLM_WORKERS", "2").strip() or 2)
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "2").strip() or 2)
+_LLM_POOL = ThreadPoolExecutor(max_workers=LLM_WORKERS, thread_name_prefix="llm")
+_TTS_POOL = ThreadPoolExecutor(max_workers=TTS_WORKERS, thread_name_prefix="tts")
+
 
 # =========================================================
 # ✅ 개선된 시스템 프롬프트
@@ -145,6 +180,10 @@ SYSTEM_PROMPT_BASE = """
 """.strip()
 
 NO_MATCH_FALLBACK = "이해를 잘 못했습니다. 다시 한 번만 말씀해주세요."
+GREETING_REPLY = "안녕하세요. 무엇을 도와드릴까요?"
+THANKS_REPLY = "네, 감사합니다."
+CLOSING_REPLY = "네, 좋은 하루 되세요."
+PLATE_RETRY_REPLY = "차량번호를 정확히 이해하지 못했습니다. 다시 한 번만 말씀해주세요."
 MAX_HISTORY_MESSAGES = 12
 
 # =========================================================
@@ -156,6 +195,12 @@ PLATE_LEAD_MIN = 2
 PLATE_LEAD_MAX = 3
 PLATE_MID_PATTERN = r"[가-힣]"
 
+_FULL_PLATE_RE = re.compile(
+    rf"(?<!\d)(\d{{{PLATE_LEAD_MIN},{PLATE_LEAD_MAX}}}{PLATE_MID_PATTERN}\d{{4}})(?!\d)"
+)
+# 부분 번호(예: "12가", "12가123")는 모두 "숫자 1~3자리 + 한글 1자" 접두를 포함한다
+_PLATE_PREFIX_RE = re.compile(rf"\d{{1,3}}{PLATE_MID_PATTERN}")
+
 KOR_DIGIT_MAP = {
     "영": "0",
     "공": "0",
@@ -171,6 +216,7 @@ KOR_DIGIT_MAP = {
     "팔": "8",
     "구": "9",
 }
+_KOR_DIGIT_TABLE = str.maketrans(KOR_DIGIT_MAP)
 
 
 def _safe_float(x, default=0.0) -> float:
@@ -180,10 +226,11 @@ def _safe_float(x, default=0.0) -> float:
         return default
 
 
+_MATCH_STRIP_RE = re.compile(r"[\s\.\,\!\?\~…]+")
+
+
 def _normalize_match_text(text: str) -> str:
-    s = (text or "").strip().lower()
-    s = re.sub(r"[\s\.\,\!\?\~…]+", "", s)
-    return s
+    return _MATCH_STRIP_RE.sub("", (text or "").strip().lower())
 
 
 def normalize_spoken_plate_text(text: str) -> str:
@@ -194,35 +241,27 @@ def normalize_spoken_plate_text(text: str) -> str:
       - "공칠가 공공일이" -> "07가0012"
       - "123가1234" -> "123가1234"
     """
-    s = (text or "").strip()
-    s = re.sub(r"\s+", "", s)
-    s = re.sub(r"[^0-9가-힣]", "", s)
+    s = re.sub(r"[^0-9가-힣]", "", text or "")
+    return s.translate(_KOR_DIGIT_TABLE)
+
 
-    out = []
-    for ch in s:
-        out.append(KOR_DIGIT_MAP.get(ch, ch))
-    return "".join(out)
+# 인사/감사/종료 발화 (_normalize_match_text 결과 기준)
+SOCIAL_GREETINGS = frozenset({"안녕하세요", "안녕", "여보세요", "네안녕하세요"})
+SOCIAL_THANKS = frozenset({"감사합니다", "고맙습니다", "고마워요", "고마워", "감사해요"})
+SOCIAL_CLOSINGS = frozenset({"안녕히계세요", "수고하세요", "안녕히가세요", "들어가세요", "바이", "bye"})
+# 대화 단계를 closing으로 넘기는 발화
+_CLOSING_PHASE_TEXTS = SOCIAL_THANKS | {"안녕히계세요", "수고하세요"}
 
 
 def try_get_social_reply(text: str) -> str:
     norm = _normalize_match_text(text)
 
-    greetings = {
-        "안녕하세요", "안녕", "여보세요", "네안녕하세요"
-    }
-    thanks = {
-        "감사합니다", "고맙습니다", "고마워요", "고마워", "감사해요"
-    }
-    closings = {
-        "안녕히계세요", "수고하세요", "안녕히가세요", "들어가세요", "바이", "bye"
-    }
-
-    if norm in greetings:
-        return "안녕하세요. 무엇을 도와드릴까요?"
-    if norm in thanks:
-        return "네, 감사합니다."
-    if norm in closings:
-        return "네, 좋은 하루 되세요."
+    if norm in SOCIAL_GREETINGS:
+        return GREETING_REPLY
+    if norm in SOCIAL_THANKS:
+        return THANKS_REPLY
+    if norm in SOCIAL_CLOSINGS:
+        return CLOSING_REPLY
     return ""
 
 
@@ -231,9 +270,11 @@ def extract_full_plate(text: str) -> str:
     정규화 후 완전한 차량번호를 추출.
     2~3자리 + 한글1자 + 4자리
     """
-    normalized = normalize_spoken_plate_text(text)
-    pattern = rf"(?<!\d)(\d{{{PLATE_LEAD_MIN},{PLATE_LEAD_MAX}}}{PLATE_MID_PATTERN}\d{{4}})(?!\d)"
-    m = re.search(pattern, normalized)
+    return _find_full_plate(normalize_spoken_plate_text(text))
+
+
+def _find_full_plate(normalized: str) -> str:
+    m = _FULL_PLATE_RE.search(normalized)
     return m.group(1) if m else ""
 
 
@@ -249,18 +290,29 @@ def is_incomplete_plate_like(text: str) -> bool:
     """
     normalized = normalize_spoken_plate_text(text)
 
-    if extract_full_plate(normalized):
+    # 접두가 없으면 완전/부분 번호 모두 불가능 → 전체 번호 검사 전에 바로 종료
+    if not _PLATE_PREFIX_RE.search(normalized):
         return False
 
-    partial_pattern = rf"(?<!\d)\d{{1,3}}{PLATE_MID_PATTERN}\d{{0,3}}(?!\d)"
-    if re.search(partial_pattern, normalized):
-        return True
+    return not _find_full_plate(normalized)
 
-    prefix_pattern = rf"\d{{1,3}}{PLATE_MID_PATTERN}"
-    if re.search(prefix_pattern, normalized):
-        return True
 
-    return False
+# 문의 유형별 키워드 (앞 순서가 우선). 유형마다 하나의 정규식으로 묶어 한 번에 검색
+_TASK_KEYWORDS: tuple[tuple[str, tuple[str, ...]], ...] = (
+    ("registration", ("주차등록", "차량등록", "방문등록", "정기권등록", "등록")),
+    ("payment", ("결제", "정산", "요금", "사전정산", "출차정산", "영수증")),
+    ("barrier", ("차단기", "입차", "출차", "안열", "안열려", "출차가안", "입차가안")),
+    ("facility", ("고장", "오류", "먹통", "정산기", "호출벨", "인터폰", "기기", "안내방송", "소음")),
+)
+_TASK_PATTERNS = tuple(
+    (task, re.compile("|".join(map(re.escape, keywords)))) for task, keywords in _TASK_KEYWORDS
+)
+
+_QUESTION_MARKERS = (
+    "알려주세요", "말씀해주세요", "말씀해 주세요", "어떤", "무엇", "맞으실까요",
+    "인가요", "하셨나요", "되셨나요", "보이시나요", "필요하신가요", "있으신가요",
+    "시도하셨나요", "확인해 주세요", "가능하실까요", "겠어요",
+)
 
 
 def infer_task_from_text(text: str) -> str | None:
@@ -269,17 +321,9 @@ def infer_task_from_text(text: str) -> str | None:
     if not norm:
         return None
 
-    if any(k in norm for k in ["주차등록", "차량등록", "방문등록", "정기권등록", "등록"]):
-        return "registration"
-
-    if any(k in norm for k in ["결제", "정산", "요금", "사전정산", "출차정산", "영수증"]):
-        return "payment"
-
-    if any(k in norm for k in ["차단기", "입차", "출차", "안열", "안열려", "출차가안", "입차가안"]):
-        return "barrier"
-
-    if any(k in norm for k in ["고장", "오류", "먹통", "정산기", "호출벨", "인터폰", "기기", "안내방송", "소음"]):
-        return "facility"
+    for task, pattern in _TASK_PATTERNS:
+        if pattern.search(norm):
+            return task
 
     return None
 
@@ -289,12 +333,7 @@ def looks_like_question(text: str) -> bool:
     if not s:
         return False
 
-    question_markers = [
-        "알려주세요", "말씀해주세요", "말씀해 주세요", "어떤", "무엇", "맞으실까요",
-        "인가요", "하셨나요", "되셨나요", "보이시나요", "필요하신가요", "있으신가요",
-        "시도하셨나요", "확인해 주세요", "가능하실까요", "겠어요"
-    ]
-    return s.endswith("?") or any(m in s for m in question_markers)
+    return s.endswith("?") or any(m in s for m in _QUESTION_MARKERS)
 
 
 def build_dialog_context(dialog_state: dict) -> str:
@@ -392,10 +431,16 @@ def build_expression_policy(vision: dict | None) -> str:
 
 
 def prepare_state_for_current_turn(dialog_state: dict, user_text: str) -> dict:
-    state = dict(dialog_state)
+    """
+    이번 턴 해석용 상태. 유형이 바뀔 때만 복사본을 만들고, 아니면 원본을 그대로 읽기 전용으로 넘긴다.
+    (반환값은 수정하지 말 것 — dialog_state 갱신은 update_dialog_state에서만)
+    """
     guessed_task = infer_task_from_text(user_text)
-    if guessed_task:
-        state["current_task"] = guessed_task
+    if not guessed_task or guessed_task == dialog_state.get("current_task"):
+        return dialog_state
+
+    state = dict(dialog_state)
+    state["current_task"] = guessed_task
     return state
 
 
@@ -424,7 +469,7 @@ def maybe_handle_fastpath(user_text: str, dialog_state: dict) -> str:
             return f"네, 차량번호 {plate}로 확인했습니다. 계속 도와드릴게요."
 
         if is_incomplete_plate_like(user_text):
-            return "차량번호를 정확히 이해하지 못했습니다. 다시 한 번만 말씀해주세요."
+            return PLATE_RETRY_REPLY
 
     return ""
 
@@ -437,9 +482,9 @@ def update_dialog_state(dialog_state: dict, user_text: str, bot_text: str) -> No
     if user_task:
         dialog_state["current_task"] = user_task
 
-    if norm_user in {"안녕하세요", "안녕", "여보세요", "네안녕하세요"}:
+    if norm_user in SOCIAL_GREETINGS:
         dialog_state["conversation_phase"] = "opening"
-    elif norm_user in {"감사합니다", "고맙습니다", "고마워요", "고마워", "감사해요", "안녕히계세요", "수고하세요"}:
+    elif norm_user in _CLOSING_PHASE_TEXTS:
         dialog_state["conversation_phase"] = "closing"
     elif looks_like_question(bot_text):
         dialog_state["conversation_phase"] = "collecting_info"
@@ -471,7 +516,7 @@ def llm_reply_sync(
     history_messages: list[dict],
     dialog_state: dict,
 ) -> str:
-    """Blocking call (run via asyncio.to_thread)."""
+    """Blocking call (run in _LLM_POOL)."""
     expr_policy = build_expression_policy(vision_state)
     context_prompt = build_dialog_context(dialog_state)
 
@@ -493,22 +538,159 @@ def llm_reply_sync(
     return (resp.choices[0].message.content or "").strip()
 
 
+# ----------------------------
+# TTS synthesizer pool
+# SpeechSynthesizer 생성 시 서비스 연결(TLS/인증)이 새로 맺어지므로 호출마다 만들지 않고 재사용
+# 풀 크기는 고정 상한이 아니라 동시 합성 수의 최대치만큼 늘어난다 (_TTS_POOL 워커 + 기동 시 prewarm 스레드)
+# ----------------------------
+# 항목은 (synthesizer, 미리 연 Connection 또는 None) 쌍 → 버려질 때 Connection 참조도 함께 사라진다
+TtsPoolEntry = tuple[speechsdk.SpeechSynthesizer, "speechsdk.Connection | None"]
+_TTS_SYNTH_POOL: "queue.SimpleQueue[TtsPoolEntry]" = queue.SimpleQueue()
+
+
+def make_tts_synthesizer() -> speechsdk.SpeechSynthesizer:
+    speech_config = speechsdk.SpeechConfig(subscription=SPEECH_KEY, region=SPEECH_REGION)
+    speech_config.speech_synthesis_voice_name = SPEECH_VOICE
+    speech_config.set_speech_synthesis_output_format(
+        speechsdk.SpeechSynthesisOutputFormat.Riff16Khz16BitMonoPcm
+    )
+    return speechsdk.SpeechSynthesizer(speech_config=speech_config, audio_config=None)
+
+
+def get_tts_synthesizer() -> TtsPoolEntry:
+    try:
+        return _TTS_SYNTH_POOL.get_nowait()
+    except queue.Empty:
+        return make_tts_synthesizer(), None
+
+
+def put_tts_synthesizer(entry: TtsPoolEntry) -> None:
+    _TTS_SYNTH_POOL.put(entry)
+
+
+def preconnect_tts_pool_sync() -> None:
+    """TTS_WORKERS개의 synthesizer를 만들어 서비스 연결을 미리 열고 풀에 넣는다 (첫 합성의 연결 지연 제거)."""
+    for _ in range(TTS_WORKERS):
+        try:
+            synthesizer = make_tts_synthesizer()
+            connection = speechsdk.Connection.from_speech_synthesizer(synthesizer)
+            connection.open(True)
+        except Exception as e:
+            logger.warning("[TTS_PRECONNECT] %s", e)
+            return
+        put_tts_synthesizer((synthesizer, connection))
+
+
 def synth_wav_sync(text: str) -> bytes:
-    """Blocking TTS (run via asyncio.to_thread). Returns WAV bytes."""
+    """Blocking TTS (run in _TTS_POOL). Returns WAV bytes."""
     try:
-        speech_config = speechsdk.SpeechConfig(subscription=SPEECH_KEY, region=SPEECH_REGION)
-        speech_config.speech_synthesis_voice_name = SPEECH_VOICE
-        speech_config.set_speech_synthesis_output_format(
-            speechsdk.SpeechSynthesisOutputFormat.Riff16Khz16BitMonoPcm
-        )
-        synthesizer = speechsdk.SpeechSynthesizer(speech_config=speech_config, audio_config=None)
-        r = synthesizer.speak_text_async(text).get()
-        if r.reason != speechsdk.ResultReason.SynthesizingAudioCompleted:
-            return b""
-        return r.audio_data
+        entry = get_tts_synthesizer()
+        r = entry[0].speak_text_async(text).get()
     except Exception as e:
-        print(f"[TTS_ERROR] {e}")
+        # 예외가 난 synthesizer는 상태를 알 수 없으므로 풀에 되돌리지 않는다 (Connection도 함께 버려짐)
+        logger.warning("[TTS_ERROR] %s", e)
+        return b""
+
+    put_tts_synthesizer(entry)
+
+    if r.reason != speechsdk.ResultReason.SynthesizingAudioCompleted:
         return b""
+    return r.audio_data
+
+
+# ----------------------------
+# TTS 캐시
+# - 고정 안내 문구: 문구가 바뀌지 않으므로 한 번 합성한 WAV를 계속 재사용
+# - 그 외 답변(fast-path/LLM): 같은 문장이 반복되는 경우가 많아 최근 답변을 LRU로 보관
+# ----------------------------
+STATIC_TTS_TEXTS = frozenset({
+    NO_MATCH_FALLBACK,
+    PLATE_RETRY_REPLY,
+    GREETING_REPLY,
+    THANKS_REPLY,
+    CLOSING_REPLY,
+})
+_TTS_CACHE: dict[str, bytes] = {}
+
+# LLM 응답 wav는 길이에 따라 수십 KB~수 MB라 항목 수가 아닌 총 바이트로 제한
+TTS_LRU_MAX_BYTES = int(os.getenv("TTS_LRU_MAX_BYTES", str(8 * 1024 * 1024)).strip() or 8 * 1024 * 1024)
+_TTS_LRU: "OrderedDict[str, bytes]" = OrderedDict()
+_tts_lru_bytes = 0
+_TTS_LRU_LOCK = threading.Lock()
+
+
+def get_cached_wav(text: str) -> bytes | None:
+    """캐시 조회만 (non-blocking, 이벤트 루프에서 바로 호출 가능)."""
+    wav = _TTS_CACHE.get(text)
+    if wav is not None:
+        return wav
+
+    with _TTS_LRU_LOCK:
+        wav = _TTS_LRU.get(text)
+        if wav is not None:
+            _TTS_LRU.move_to_end(text)
+        return wav
+
+
+def synth_wav_cached_sync(text: str) -> bytes:
+    """synth_wav_sync + TTS 캐시 (run in _TTS_POOL)."""
+    global _tts_lru_bytes
+
+    wav = get_cached_wav(text)
+    if wav is not None:
+        return wav
+
+    wav = synth_wav_sync(text)
+    if not wav:
+        # 합성 실패는 캐시하지 않음
+        return wav
+
+    if text in STATIC_TTS_TEXTS:
+        _TTS_CACHE[text] = wav
+    elif len(wav) <= TTS_LRU_MAX_BYTES:
+        with _TTS_LRU_LOCK:
+            old = _TTS_LRU.pop(text, None)
+            if old is not None:
+                _tts_lru_bytes -= len(old)
+            _TTS_LRU[text] = wav
+            _tts_lru_bytes += len(wav)
+            while _tts_lru_bytes > TTS_LRU_MAX_BYTES:
+                _, evicted = _TTS_LRU.popitem(last=False)
+                _tts_lru_bytes -= len(evicted)
+    return wav
+
+
+def prewarm_static_tts_sync() -> None:
+    """synthesizer 풀 연결을 미리 열고 고정 안내 문구를 합성해 캐시 (run in default executor)."""
+    preconnect_tts_pool_sync()
+    for text in STATIC_TTS_TEXTS:
+        if not synth_wav_cached_sync(text):
+            logger.warning("[TTS_PREWARM] failed: %s", text)
+
+
+# ----------------------------
+# App lifecycle
+# 시작: 로그 리스너 → TTS prewarm / 종료: 풀 정리(진행 중 작업 로그 포함) → 로그 리스너 정지
+# ----------------------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    _log_listener.start()
+
+    # 서버 기동을 막지 않도록 백그라운드에서 실행 (태스크 참조는 app.state에 보관)
+    # _TTS_POOL 워커를 점유하지 않도록 기본 executor 사용 → 기동 직후 요청도 TTS 워커 전부를 쓸 수 있음
+    loop = asyncio.get_running_loop()
+    app.state.tts_prewarm_task = loop.run_in_executor(None, prewarm_static_tts_sync)
+
+    try:
+        yield
+    finally:
+        # 대기 중인 작업은 취소하고 실행 중인 작업은 끝날 때까지 기다림 (이벤트 루프는 막지 않음)
+        for pool in (_LLM_POOL, _TTS_POOL):
+            await asyncio.to_thread(pool.shutdown, wait=True, cancel_futures=True)
+        _log_listener.stop()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 @app.websocket("/ws/voice")
@@ -521,15 +703,24 @@ async def ws_voice(ws: WebSocket):
         return
 
     await _ACTIVE_SESSION_LOCK.acquire()
+    # 락 획득 직후부터 해제를 보장 (accept/인식 시작 등 세션 준비 중 예외·취소가 나도 다음 세션이 막히지 않도록)
+    try:
+        await run_voice_session(ws)
+    finally:
+        _ACTIVE_SESSION_LOCK.release()
+
+
+async def run_voice_session(ws: WebSocket):
+    """단일 세션 본체 (ws_voice가 _ACTIVE_SESSION_LOCK을 잡은 상태에서 호출)."""
     await ws.accept()
 
     # Latest expression-only camera signal (per websocket session)
     last_vision_state: dict | None = None
-    _last_expr_log_ts = 0.0
+    _last_expr_log_ts = float("-inf")
 
-    # STT 애매 인식 fallback용 타임스탬프
-    last_partial_ts = 0.0
-    last_no_match_queue_ts = 0.0
+    # STT 애매 인식 fallback용 타임스탬프 (time.monotonic 기준)
+    last_partial_ts = float("-inf")
+    last_no_match_queue_ts = float("-inf")
 
     # 최근 대화 히스토리 / 상태
     chat_history = deque(maxlen=MAX_HISTORY_MESSAGES)
@@ -562,26 +753,53 @@ async def ws_voice(ws: WebSocket):
     turn_id = 0
     turn_lock = asyncio.Lock()
 
-    async def send_json(payload: dict):
+    def ws_open() -> bool:
+        # 끊긴 뒤에는 send가 예외로 끝나므로 미리 상태만 보고 건너뛴다
+        return (
+            ws.client_state == WebSocketState.CONNECTED
+            and ws.application_state == WebSocketState.CONNECTED
+        )
+
+    async def send_text(data: str):
+        if not ws_open():
+            return
         try:
-            await ws.send_text(json.dumps(payload, ensure_ascii=False))
+            await ws.send_text(data)
         except Exception:
             pass
 
-    def bump_turn_and_barge_in():
-        """User started speaking -> cancel current turn + notify frontend."""
+    async def send_json(payload: dict):
+        await send_text(json.dumps(payload, ensure_ascii=False))
+
+    # 루프는 create_task 결과를 약한 참조로만 들고 있으므로 완료 전까지 여기서 보관, 세션 종료 시 일괄 취소
+    bg_tasks: set[asyncio.Task] = set()
+
+    def spawn(coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        bg_tasks.add(task)
+        task.add_done_callback(bg_tasks.discard)
+        return task
+
+    def bump_turn():
+        """User started speaking -> cancel current turn."""
         nonlocal turn_id
         turn_id += 1
-        loop.call_soon_threadsafe(lambda: asyncio.create_task(send_json({"type": "barge_in"})))
+
+    def bump_turn_and_barge_in():
+        """bump_turn + notify frontend."""
+        bump_turn()
+        loop.call_soon_threadsafe(lambda: spawn(send_json({"type": "barge_in"})))
 
     def on_recognizing(evt):
         nonlocal last_partial_ts
         text = (evt.result.text or "").strip()
         if not text:
             return
-        last_partial_ts = time.time()
-        bump_turn_and_barge_in()
-        loop.call_soon_threadsafe(lambda: asyncio.create_task(send_json({"type": "partial", "text": text})))
+        last_partial_ts = time.monotonic()
+        # 프론트는 partial 수신 시에도 재생을 중단하므로 barge_in을 별도 프레임으로 보내지 않음
+        # (partial마다 WS 프레임/스레드 hop 1회)
+        bump_turn()
+        loop.call_soon_threadsafe(lambda: spawn(send_json({"type": "partial", "text": text})))
 
     def on_recognized(evt):
         nonlocal last_partial_ts, last_no_match_queue_ts
@@ -601,7 +819,7 @@ async def ws_voice(ws: WebSocket):
 
         # 애매하게 끊긴 발화도 무응답으로 끝내지 않기
         if reason == speechsdk.ResultReason.NoMatch:
-            now = time.time()
+            now = time.monotonic()
             if (now - last_partial_ts) < 2.5 and (now - last_no_match_queue_ts) > 1.5:
                 last_no_match_queue_ts = now
                 loop.call_soon_threadsafe(
@@ -611,7 +829,23 @@ async def ws_voice(ws: WebSocket):
 
     recognizer.recognizing.connect(on_recognizing)
     recognizer.recognized.connect(on_recognized)
-    recognizer.start_continuous_recognition()
+
+    async def send_bot_reply(bot: str, my_turn: int):
+        """bot_text 전송 + TTS 합성/전송. 합성 중 턴이 바뀌었으면 오디오는 보내지 않는다."""
+        await send_json({"type": "bot_text", "text": bot})
+
+        # 캐시 hit이면 스레드 hop 없이 바로 사용
+        wav = get_cached_wav(bot)
+        if wav is None:
+            wav = await loop.run_in_executor(_TTS_POOL, synth_wav_cached_sync, bot)
+
+        if my_turn != turn_id or not wav or not ws_open():
+            return
+
+        try:
+            await ws.send_bytes(wav)
+        except Exception:
+            pass
 
     async def final_consumer():
         nonlocal turn_id, last_vision_state
@@ -627,19 +861,7 @@ async def ws_voice(ws: WebSocket):
                     if my_turn != turn_id:
                         continue
 
-                    bot = NO_MATCH_FALLBACK
-                    await send_json({"type": "bot_text", "text": bot})
-
-                    wav = await asyncio.to_thread(synth_wav_sync, bot)
-
-                    if my_turn != turn_id:
-                        continue
-
-                    if wav:
-                        try:
-                            await ws.send_bytes(wav)
-                        except Exception:
-                            pass
+                    await send_bot_reply(NO_MATCH_FALLBACK, my_turn)
                 continue
 
             # 2) normal recognized speech
@@ -661,7 +883,8 @@ async def ws_voice(ws: WebSocket):
                 # fallback to LLM with recent history + state
                 if not bot:
                     try:
-                        bot = await asyncio.to_thread(
+                        bot = await loop.run_in_executor(
+                            _LLM_POOL,
                             llm_reply_sync,
                             user_text,
                             last_vision_state,
@@ -669,7 +892,7 @@ async def ws_voice(ws: WebSocket):
                             state_for_turn,
                         )
                     except Exception as e:
-                        print(f"[LLM_ERROR] {e}")
+                        logger.warning("[LLM_ERROR] %s", e)
                         bot = NO_MATCH_FALLBACK
 
                 if not bot:
@@ -683,82 +906,120 @@ async def ws_voice(ws: WebSocket):
                 chat_history.append({"role": "assistant", "content": bot})
                 update_dialog_state(dialog_state, user_text, bot)
 
-                await send_json({"type": "bot_text", "text": bot})
+                await send_bot_reply(bot, my_turn)
 
-                wav = await asyncio.to_thread(synth_wav_sync, bot)
+    # 프레임마다 반복되는 속성 조회를 피하기 위해 루프 밖에서 바인딩
+    receive = ws.receive
+    write_audio = push_stream.write
 
-                if my_turn != turn_id:
-                    continue
+    # 유휴 감시: 수신 루프는 오디오 프레임마다 시각만 기록하고(receive를 timeout으로 감싸지 않음),
+    # watchdog 태스크가 마감 시각에만 깨어나 확인한다. 첫 오디오 전(None)에는 grace 기준.
+    last_audio_ts: float | None = None
+    session_start_ts = loop.time()
 
-                if wav:
-                    try:
-                        await ws.send_bytes(wav)
-                    except Exception:
-                        pass
+    async def idle_watchdog():
+        while True:
+            now = loop.time()
+            if last_audio_ts is None:
+                deadline = session_start_ts + WS_FIRST_AUDIO_GRACE_SEC
+            else:
+                deadline = last_audio_ts + WS_IDLE_TIMEOUT_SEC
+            if now < deadline:
+                await asyncio.sleep(deadline - now)
+                continue
 
-    consumer_task = asyncio.create_task(final_consumer())
+            # 좀비 세션이 단일 세션 락을 계속 잡고 있지 않도록 종료 → 수신 루프는 disconnect 메시지로 빠져나감
+            logger.info("[WS] no audio before deadline, closing session")
+            try:
+                await ws.close(code=1001)
+            except Exception:
+                pass
+            return
 
     try:
+        # start/stop_continuous_recognition()은 SDK 연결 수립/종료까지 블로킹 → 이벤트 루프 밖에서 실행
+        # (try 안에서 시작해야 시작 중 예외/취소 시에도 아래 finally에서 stream/recognizer가 정리됨)
+        await asyncio.to_thread(recognizer.start_continuous_recognition)
+
+        spawn(final_consumer())
+        spawn(idle_watchdog())
+
         while True:
-            msg = await ws.receive()
+            msg = await receive()
+
+            # audio bytes: 대부분의 프레임이므로 제어 메시지 분기보다 먼저 처리
+            data = msg.get("bytes")
+            if data:
+                last_audio_ts = loop.time()
+                write_audio(data)
+                continue
+
+            # ws.receive()는 끊김을 예외가 아닌 disconnect 메시지로 돌려준다 (이후 receive는 RuntimeError)
+            if msg["type"] == "websocket.disconnect":
+                break
 
             # control
-            if "text" in msg and msg["text"]:
-                try:
-                    ctrl = json.loads(msg["text"])
-                    ctype = ctrl.get("type")
+            # 제어 메시지는 항상 JSON 객체 → 그 외 텍스트는 파싱/예외 비용 없이 무시
+            text = msg.get("text")
+            if not text or text[0] != "{":
+                continue
 
-                    if ctype == "stop":
-                        break
+            try:
+                ctrl = json.loads(text)
+                ctype = ctrl.get("type")
 
-                    if ctype == "barge_in":
-                        bump_turn_and_barge_in()
-                        continue
+                if ctype == "stop":
+                    break
 
-                    if ctype == "vision_expression":
-                        last_vision_state = ctrl
-
-                        # throttled server log
-                        now = time.time()
-                        if now - _last_expr_log_ts > 2.0:
-                            _last_expr_log_ts = now
-                            e = ctrl.get("expression") or {}
-                            print(
-                                f"[VISION_EXPR] label={e.get('label')} "
-                                f"conf={e.get('confidence')} v={e.get('valence')} a={e.get('arousal')}"
-                            )
-                        continue
+                if ctype == "barge_in":
+                    bump_turn_and_barge_in()
+                    continue
 
-                except Exception:
-                    pass
+                if ctype == "vision_expression":
+                    last_vision_state = ctrl
+
+                    # throttled server log
+                    now = time.monotonic()
+                    if now - _last_expr_log_ts > 2.0:
+                        _last_expr_log_ts = now
+                        e = ctrl.get("expression") or {}
+                        logger.info(
+                            "[VISION_EXPR] label=%s conf=%s v=%s a=%s",
+                            e.get("label"), e.get("confidence"), e.get("valence"), e.get("arousal"),
+                        )
+                    continue
 
-            # audio bytes
-            if "bytes" in msg and msg["bytes"]:
-                push_stream.write(msg["bytes"])
+            except Exception:
+                pass
 
     except WebSocketDisconnect:
         pass
     finally:
+        # 아래 teardown에는 await가 있어 CancelledError(예: 서버 종료 시 태스크 취소)로 중단될 수 있음
+        # → 태스크 취소 요청은 바깥 finally에서 항상 수행 (단일 세션 락 해제는 ws_voice에서)
         try:
-            push_stream.close()
-        except Exception:
-            pass
-
-        try:
-            recognizer.stop_continuous_recognition()
-        except Exception:
-            pass
-
-        try:
-            consumer_task.cancel()
-        except Exception:
-            pass
-
-        try:
-            if _ACTIVE_SESSION_LOCK.locked():
-                _ACTIVE_SESSION_LOCK.release()
-        except Exception:
-            pass
+            try:
+                push_stream.close()
+            except Exception:
+                pass
+
+            try:
+                await asyncio.to_thread(recognizer.stop_continuous_recognition)
+            except Exception:
+                pass
+
+            # consumer + 전송 대기 중인 태스크 정리 (취소 완료까지 대기해 세션 간 태스크가 남지 않도록)
+            pending = list(bg_tasks)
+            for task in pending:
+                task.cancel()
+            try:
+                await asyncio.gather(*pending, return_exceptions=True)
+            except Exception:
+                pass
+        finally:
+            # 위 gather 전에 중단된 경우에도 태스크가 다음 세션까지 남지 않도록 취소 요청만은 동기로 보장
+            for task in list(bg_tasks):
+                task.cancel()
 
 
 @app.get("/health")
@@ -3,7 +3,11 @@ class PCM16Processor extends AudioWorkletProcessor {
   constructor() {
     super();
     this.targetRate = 16000;
-    this._buffer = [];
+
+    // render quantum(128 frames)마다 postMessage/WS 전송하지 않고 20ms(320 samples) 단위로 모아서 전송
+    this.chunkSamples = 320;
+    this._chunk = new Int16Array(this.chunkSamples);
+    this._chunkLen = 0;
   }
 
   // naive downsample: inputRate -> 16k
@@ -30,15 +34,21 @@ class PCM16Processor extends AudioWorkletProcessor {
     return output;
   }
 
-  floatToPCM16(float32) {
-    const buffer = new ArrayBuffer(float32.length * 2);
-    const view = new DataView(buffer);
+  // float32 -> int16을 chunk 버퍼에 바로 기록, 가득 차면 메인 스레드로 전송
+  pushPCM16(float32) {
     for (let i = 0; i < float32.length; i++) {
-      let s = Math.max(-1, Math.min(1, float32[i]));
-      // scale to int16
-      view.setInt16(i * 2, s < 0 ? s * 0x8000 : s * 0x7fff, true);
+      const s = Math.max(-1, Math.min(1, float32[i]));
+      // scale to int16 (브라우저 플랫폼은 little-endian → 서버가 기대하는 PCM16LE와 동일)
+      this._chunk[this._chunkLen++] = s < 0 ? s * 0x8000 : s * 0x7fff;
+
+      if (this._chunkLen === this.chunkSamples) {
+        // 버퍼 소유권을 넘기고(transfer, 복사 없음) 새 chunk 할당
+        const buffer = this._chunk.buffer;
+        this.port.postMessage(buffer, [buffer]);
+        this._chunk = new Int16Array(this.chunkSamples);
+        this._chunkLen = 0;
+      }
     }
-    return buffer;
   }
 
   process(inputs) {
@@ -47,10 +57,7 @@ class PCM16Processor extends AudioWorkletProcessor {
 
     const mono = input[0]; // first channel
     const down = this.downsampleTo16k(mono, sampleRate);
-    const pcm16 = this.floatToPCM16(down);
-
-    // 메인 스레드로 전송 (ArrayBuffer)
-    this.port.postMessage(pcm16, [pcm16]);
+    this.pushPCM16(down);
     return true;
   }
 }